@@ -1,236 +1,11 @@
 import streamlit as st
-import math
 import datetime
 import zoneinfo
 import random
-
-# Utility functions
-def rev(angle):
-    return angle - math.floor(angle / 360) * 360
-
-# Julian Date calculation
-def julian_date(year, month, day, hour=0, minute=0, second=0):
-    if month == 1 or month == 2:
-        yearp = year - 1
-        monthp = month + 12
-    else:
-        yearp = year
-        monthp = month
-    
-    if year < 1582 or (year == 1582 and (month < 10 or (month == 10 and day < 15))):
-        B = 0
-    else:
-        A = math.floor(yearp / 100)
-        B = 2 - A + math.floor(A / 4)
-    
-    C = math.floor(365.25 * (yearp + 4716))
-    D = math.floor(30.6001 * (monthp + 1))
-    jd = B + day + C + D - 1524.5
-    jd += (hour + minute / 60.0 + second / 3600.0) / 24.0
-    return jd
-
-# Calculate Sun's ecliptic longitude
-def calculate_sun_longitude(d):
-    w = 282.9404 + 4.70935e-5 * d
-    e = 0.016709 - 1.151e-9 * d
-    M = rev(356.0470 + 0.9856002585 * d)
-    Mrad = math.radians(M)
-    E = M + math.degrees(e * math.sin(Mrad) * (1.0 + e * math.cos(Mrad)))
-    Erad = math.radians(E)
-    xv = math.cos(Erad) - e
-    yv = math.sin(Erad) * math.sqrt(1.0 - e*e)
-    v = math.degrees(math.atan2(yv, xv))
-    lonsun = rev(v + w)
-    return lonsun
-
-# Improved Moon's ecliptic longitude calculation
-def calculate_moon_longitude(d):
-    T = d / 36525.0
-    L0 = 218.31617 + 481267.88088 * T - 4.06 * T**2 / 3600.0
-    M = 134.96292 + 477198.86753 * T + 33.25 * T**2 / 3600.0
-    MSun = 357.52543 + 35999.04944 * T - 0.58 * T**2 / 3600.0
-    F = 93.27283 + 483202.01873 * T - 11.56 * T**2 / 3600.0
-    D = 297.85027 + 445267.11135 * T - 5.15 * T**2 / 3600.0
-    Delta = (22640 * math.sin(math.radians(M))
-             + 769 * math.sin(math.radians(2 * M))
-             - 4586 * math.sin(math.radians(M - 2 * D))
-             + 2370 * math.sin(math.radians(2 * D))
-             - 668 * math.sin(math.radians(MSun))
-             - 412 * math.sin(math.radians(2 * F))
-             - 125 * math.sin(math.radians(D))
-             - 212 * math.sin(math.radians(2 * M - 2 * D))
-             - 206 * math.sin(math.radians(M + MSun - 2 * D))
-             + 192 * math.sin(math.radians(M + 2 * D))
-             - 165 * math.sin(math.radians(MSun - 2 * D))
-             + 148 * math.sin(math.radians(L0 - MSun))
-             - 110 * math.sin(math.radians(M + MSun))
-             - 55 * math.sin(math.radians(2 * F - 2 * D))) / 3600.0
-    lonecl = rev(L0 + Delta)
-    return lonecl
-
-# Lahiri Ayanamsa approximation
-def calculate_ayanamsa(jd):
-    base_ayan = 23.853  # for J2000
-    rate_per_year = 50.2719 / 3600  # degrees per year
-    years = (jd - 2451545.0) / 365.25
-    ayan = base_ayan + years * rate_per_year
-    return ayan
-
-# Calculate approximate ascendant
-def calculate_ascendant(jd, lat, lon):
-    d = jd - 2451545.0
-    eps = 23.439281 - 0.0000004 * d
-    gmst = rev(280.46061837 + 360.98564736629 * d)
-    lst = rev(gmst + lon + 90)  # Adjustment for sidereal time
-    lst_rad = math.radians(lst)
-    eps_rad = math.radians(eps)
-    lat_rad = math.radians(lat)
-    y = math.sin(lst_rad)
-    x = math.cos(lst_rad) * math.cos(eps_rad) - math.sin(eps_rad) * math.tan(lat_rad)
-    asc_trop = math.degrees(math.atan2(y, x))
-    if asc_trop < 0:
-        asc_trop += 360
-    return asc_trop
-
-# Planetary elements at J2000
-planetary_elements = {
-    'mercury': {
-        'N0': 48.3313, 'N_rate': 3.24587e-5,
-        'i0': 7.0047, 'i_rate': 5.00e-8,
-        'w0': 29.1241, 'w_rate': 1.01444e-5,
-        'a': 0.387098,
-        'e0': 0.205635, 'e_rate': 5.59e-10,
-        'M0': 168.6562, 'M_rate': 4.0923344368
-    },
-    'venus': {
-        'N0': 76.6799, 'N_rate': 2.46590e-5,
-        'i0': 3.3946, 'i_rate': 2.75e-8,
-        'w0': 54.8910, 'w_rate': 1.38374e-5,
-        'a': 0.723330,
-        'e0': 0.006773, 'e_rate': -1.302e-9,
-        'M0': 48.0052, 'M_rate': 1.6021302244
-    },
-    'mars': {
-        'N0': 49.5574, 'N_rate': 2.11081e-5,
-        'i0': 1.8497, 'i_rate': -1.78e-8,
-        'w0': 286.5016, 'w_rate': 2.92961e-5,
-        'a': 1.523688,
-        'e0': 0.093405, 'e_rate': 2.516e-9,
-        'M0': 18.6021, 'M_rate': 0.5240207766
-    },
-    'jupiter': {
-        'N0': 100.4542, 'N_rate': 2.76854e-5,
-        'i0': 1.3030, 'i_rate': -1.557e-7,
-        'w0': 273.8777, 'w_rate': 1.64505e-5,
-        'a': 5.20256,
-        'e0': 0.048498, 'e_rate': 4.469e-9,
-        'M0': 19.8950, 'M_rate': 0.0830853001
-    },
-    'saturn': {
-        'N0': 113.6634, 'N_rate': 2.38980e-5,
-        'i0': 2.4886, 'i_rate': -1.081e-7,
-        'w0': 339.3939, 'w_rate': 2.97661e-5,
-        'a': 9.55475,
-        'e0': 0.055546, 'e_rate': -9.499e-9,
-        'M0': 316.9670, 'M_rate': 0.0334442282
-    }
-}
-
-# Function to get ecliptic longitude for a planet
-def get_ecliptic_longitude(d, planet):
-    if planet == 'sun':
-        return calculate_sun_longitude(d)
-    elif planet == 'moon':
-        return calculate_moon_longitude(d)
-    elif planet == 'rahu':
-        N = 125.1228 - 0.0529538083 * d
-        return rev(N)
-    elif planet == 'ketu':
-        return rev(get_ecliptic_longitude(d, 'rahu') + 180)
-    else:
-        # Compute Sun's position for geocentric correction
-        sun_lon = calculate_sun_longitude(d)
-        xs = math.cos(math.radians(sun_lon))
-        ys = math.sin(math.radians(sun_lon))
-        # Planet elements
-        el = planetary_elements[planet]
-        N = el['N0'] + el['N_rate'] * d
-        i = el['i0'] + el['i_rate'] * d
-        w = el['w0'] + el['w_rate'] * d
-        a = el['a']
-        e = el['e0'] + el['e_rate'] * d
-        M = rev(el['M0'] + el['M_rate'] * d)
-        # Eccentric anomaly E
-        E = M + math.degrees(e * math.sin(math.radians(M)) * (1 + e * math.cos(math.radians(M))))
-        for _ in range(5):
-            E_prev = E
-            E = E_prev - (E_prev - math.degrees(e * math.sin(math.radians(E_prev))) - M) / (1 - e * math.cos(math.radians(E_prev)))
-            if abs(E - E_prev) < 0.001:
-                break
-        # True anomaly v and r
-        xv = a * (math.cos(math.radians(E)) - e)
-        yv = a * math.sqrt(1 - e**2) * math.sin(math.radians(E))
-        v = math.degrees(math.atan2(yv, xv))
-        r = math.sqrt(xv**2 + yv**2)
-        # Heliocentric coordinates
-        xh = r * (math.cos(math.radians(N)) * math.cos(math.radians(v + w)) - math.sin(math.radians(N)) * math.sin(math.radians(v + w)) * math.cos(math.radians(i)))
-        yh = r * (math.sin(math.radians(N)) * math.cos(math.radians(v + w)) + math.cos(math.radians(N)) * math.sin(math.radians(v + w)) * math.cos(math.radians(i)))
-        zh = r * math.sin(math.radians(v + w)) * math.sin(math.radians(i))
-        # Geocentric
-        xge = xs + xh
-        yge = ys + yh
-        zge = zh
-        # Ecliptic longitude
-        lon = math.degrees(math.atan2(yge, xge))
-        return rev(lon)
-
-# Get approximate speed for retrograde detection
-def get_speed(d, planet):
-    dt = 0.01  # small fraction of day
-    long1 = get_ecliptic_longitude(d, planet)
-    long2 = get_ecliptic_longitude(d + dt, planet)
-    delta = (long2 - long1 + 180) % 360 - 180
-    return delta / dt
-
-# Dictionary for sign rulers
-ruler_of = {
-    0: 'mars',  # Aries
-    1: 'venus',  # Taurus
-    2: 'mercury',  # Gemini
-    3: 'moon',  # Cancer
-    4: 'sun',  # Leo
-    5: 'mercury',  # Virgo
-    6: 'venus',  # Libra
-    7: 'mars',  # Scorpio
-    8: 'jupiter',  # Sagittarius
-    9: 'saturn',  # Capricorn
-    10: 'saturn',  # Aquarius
-    11: 'jupiter'  # Pisces
-}
-
-# Deity map from planets for Ishta and Aradhya
-deity_map = {
-    'sun': 'Shiva or Rama',
-    'moon': 'Parvati or Krishna',
-    'mars': 'Skanda (Kartikeya) or Narasimha',
-    'mercury': 'Vishnu',
-    'jupiter': 'Brahma or Guru forms',
-    'venus': 'Lakshmi',
-    'saturn': 'Shani or Ayyappa',
-    'rahu': 'Durga',
-    'ketu': 'Ganesha'
-}
-
-# Additional map for Aradhya Devata examples
-aradhya_map = {
-    'mars': 'Hanuman',
-    'venus': 'Lakshmi',
-    'mercury': 'Durga',
-    'sun': 'Surya or Vishnu',
-    'moon': 'Chandra or Parvati',
-    'jupiter': 'Guru or Brahma',
-    'saturn': 'Shani'
-}
+from chart import (
+    julian_date, jd_to_datetime, ruler_of, deity_map, aradhya_map, nakshatras, rashis, ChartGraph
+)
+from rectify import rectification_segments
 
 # Fun descriptions for Devas (shared for Ishta and Aradhya, with imagination)
 fun_desc = {
@@ -367,24 +142,6 @@ element_interplay_phrases = {
     ("Water", "Water"): "diving deep into emotions, but risk of overwhelming floods 💧💧"
 }
 
-# List of Nakshatras (consistent across both apps)
-nakshatras = ["Ashwini", "Bharani", "Krittika", "Rohini", "Mrigashira", "Ardra", "Punarvasu", "Pushya", "Ashlesha", "Magha", "Purvaphalguni", "Uttaraphalguni", "Hasta", "Chitra", "Swati", "Vishakha", "Anuradha", "Jyeshta", "Mula", "Purvashada", "Uttarashada", "Shravana", "Dhanishta", "Shatabhisha", "Purvabhadra", "Uttarabhadra", "Revati"]
-
-# Original Pancha Pakshi bird mapping
-shukla_birds = {
-    "Vulture": ["Ashwini", "Bharani", "Krittika", "Rohini", "Mrigashira"],
-    "Owl": ["Ardra", "Punarvasu", "Pushya", "Ashlesha", "Magha", "Purvaphalguni"],
-    "Crow": ["Uttaraphalguni", "Hasta", "Chitra", "Swati", "Vishakha"],
-    "Cock": ["Anuradha", "Jyeshta", "Mula", "Purvashada", "Uttarashada"],
-    "Peacock": ["Shravana", "Dhanishta", "Shatabhisha", "Purvabhadra", "Uttarabhadra", "Revati"]
-}
-krishna_birds = {
-    "Peacock": ["Ashwini", "Bharani", "Krittika", "Rohini", "Mrigashira"],
-    "Cock": ["Ardra", "Punarvasu", "Pushya", "Ashlesha", "Magha", "Purvaphalguni"],
-    "Crow": ["Uttaraphalguni", "Hasta", "Chitra", "Swati", "Vishakha"],
-    "Owl": ["Anuradha", "Jyeshta", "Mula", "Purvashada", "Uttarashada"],
-    "Vulture": ["Shravana", "Dhanishta", "Shatabhisha", "Purvabhadra", "Uttarabhadra", "Revati"]
-}
 
 # Original elements and mappings (Pancha Pakshi system)
 rashi_elements = {
@@ -577,97 +334,35 @@ if st.button("Generate Fun Insights! 🌟"):
         year, month, day = utc_dt.year, utc_dt.month, utc_dt.day
         hour, minute, second = utc_dt.hour, utc_dt.minute, utc_dt.second
         jd = julian_date(year, month, day, hour, minute, second)
-        d = jd - 2451545.0
-        
-        # Compute longitudes
-        longitudes = {}
-        planets = ['sun', 'moon', 'mercury', 'venus', 'mars', 'jupiter', 'saturn', 'rahu', 'ketu']
-        for planet in planets:
-            longitudes[planet] = get_ecliptic_longitude(d, planet)
-        
-        # Speeds and retrogrades
-        retro = {}
-        speeds = {}
-        for planet in planets:
-            speeds[planet] = get_speed(d, planet)
-            retro[planet] = speeds[planet] < 0
-        
-        # Sign degrees for Atmakaraka (exclude ketu)
-        sign_deg = {}
-        ak_planets = ['sun', 'moon', 'mercury', 'venus', 'mars', 'jupiter', 'saturn', 'rahu']
-        for planet in ak_planets:
-            sl = longitudes[planet] % 30
-            if retro[planet]:
-                sl = 30 - sl
-            sign_deg[planet] = sl
-        
-        atmakaraka = max(sign_deg, key=sign_deg.get)
         
-        # Navamsa signs (D9 longitude = sid_long * 9 % 360, sign = floor(/30))
-        nav_signs = {}
-        for planet in planets:
-            sid_long = longitudes[planet]
-            nav_long = (sid_long * 9) % 360
-            nav_sign = int(nav_long // 30)
-            nav_signs[planet] = nav_sign
-        
-        # Karakamsa = nav sign of atmakaraka
-        karakamsa = nav_signs[atmakaraka]
-        
-        # 12th from Karakamsa
-        twelfth_sign = (karakamsa + 11) % 12
-        
-        # Planets in 12th navamsa sign
-        planets_in_twelfth = [p for p in planets if nav_signs[p] == twelfth_sign]
-        
-        # Ishta planet
-        if planets_in_twelfth:
-            ishta_planet = planets_in_twelfth[0]  # Pick first for fun
-        else:
-            ishta_planet = ruler_of[twelfth_sign]
+        # Chart quantities come from a memoized dependency graph kept per
+        # session, so changing only the location re-evaluates the ascendant
+        # branch and reuses the planetary nodes
+        if 'chart_graph' not in st.session_state:
+            st.session_state.chart_graph = ChartGraph()
+        graph = st.session_state.chart_graph
+        graph.set_inputs(jd=jd, lat=lat, lon=lon)
         
         # Ishta Devata
+        ishta_planet = graph.get('ishta_planet')
         ishta_deva = deity_map[ishta_planet]
         ishta_fun = fun_desc[ishta_deva]
         
         # Aditya from Sun sign (sidereal Sun //30)
-        ayan = calculate_ayanamsa(jd)
-        sid_sun = (longitudes['sun'] - ayan) % 360
-        sun_sign = int(sid_sun // 30)
+        sun_sign = graph.get('sun_sign')
         aditya = adityas[sun_sign]
         aditya_fun = aditya_desc[sun_sign]
         
         # Additional computations from divination code
-        sun_long = longitudes['sun']
-        moon_long = longitudes['moon']
-        sid_moon = (moon_long - ayan) % 360
-        
-        nak_num = math.floor(sid_moon / (360 / 27))
-        nak_rem = sid_moon % (360 / 27)
-        pada = math.floor(nak_rem / (360 / 108)) + 1
-        
-        rashi_num = math.floor(sid_moon / 30)
-        
-        elong = (moon_long - sun_long) % 360
-        paksha = "Shukla" if elong < 180 else "Krishna"
+        nak_num, pada = graph.get('nakshatra')
+        rashi_num = graph.get('moon_sign')
+        paksha = graph.get('paksha')
         
         nak_name = nakshatras[nak_num]
-        
-        rashis = ["Mesha", "Vrishabha", "Mithuna", "Karka", "Simha", "Kanya", "Tula", "Vrishchika", "Dhanu", "Makara", "Kumbha", "Meena"]
         rashi_name = rashis[rashi_num]
         
         # Pancha Pakshi ruling bird (original system)
-        ruling_bird = None
-        if paksha == "Shukla":
-            for bird, naks in shukla_birds.items():
-                if nak_name in naks:
-                    ruling_bird = bird
-                    break
-        else:
-            for bird, naks in krishna_birds.items():
-                if nak_name in naks:
-                    ruling_bird = bird
-                    break
+        ruling_bird = graph.get('ruling_bird')
         
         element = bird_to_element.get(ruling_bird, "Unknown")
         
@@ -680,11 +375,8 @@ if st.button("Generate Fun Insights! 🌟"):
         dynamic_desc = f"You are a {r_trait} infused with {n_trait} in Pada {pada} precision ⏳, guided by {ruling_bird} ({sanskrit_name}) of {element} vibes as per Agastya Muni's Pancha Pakshi Shastra, where your bird cycles through Ruling (powerful actions), Eating (gains), Walking (progress), Sleeping (rest), and Dying (caution)—time your endeavors accordingly for cosmic harmony! {fun_phrase}"
         
         # Calculate Sun sign and Ascendant sign
-        sun_rashi_num = math.floor(sid_sun / 30)
-        sun_rashi_name = rashis[sun_rashi_num]
-        asc_trop = calculate_ascendant(jd, lat, lon)
-        sid_asc = (asc_trop - ayan) % 360
-        asc_rashi_num = math.floor(sid_asc / 30)
+        sun_rashi_name = rashis[sun_sign]
+        asc_rashi_num = graph.get('asc_sign')
         asc_rashi_name = rashis[asc_rashi_num]
         
         # Get descriptions
@@ -708,22 +400,18 @@ if st.button("Generate Fun Insights! 🌟"):
         )
         
         # Aradhya Devata from 5th house (imaginative, based on ruler)
-        fifth_sign = (asc_rashi_num + 4) % 12
-        fifth_ruler = ruler_of[fifth_sign]
+        fifth_ruler = graph.get('fifth_ruler')
         aradhya_deva = aradhya_map.get(fifth_ruler, deity_map.get(fifth_ruler, 'Unknown'))
         aradhya_fun = fun_desc.get(aradhya_deva, 'Mysterious guiding force! 🌌')
         
         # Imaginative Vasu and Rudra
         vasu = get_vasu(moon_element)
         vasu_fun_desc = vasu_fun.get(vasu, 'Cosmic element anchor! ✨')
-        rahu_long = longitudes['rahu']
-        sid_rahu = (rahu_long - ayan) % 360
-        rahu_sign = int(sid_rahu // 30)
-        rudra = get_rudra(rahu_sign)
+        rudra = get_rudra(graph.get('rahu_sign'))
         rudra_fun_desc = rudra_fun.get(rudra, 'Life-force transformer! 💥')
         
         # Indra from 10th house (authority)
-        tenth_sign = (asc_rashi_num + 9) % 12
+        tenth_sign = graph.get('tenth_sign')
         indra_influence = f"Indra's authority surges in your {rashis[tenth_sign]} 10th house, empowering career conquests like thunderbolts! ⚡🏆 Imagine ruling realms with divine might!"
         
         # Prajapati from Lagna
@@ -757,6 +445,29 @@ if st.button("Generate Fun Insights! 🌟"):
         st.write(f"- **Prajapati Influence (Creation from Ascendant):** {prajapati_influence}")
         st.write("These insights draw from Vedic concepts like the Adityas, Vasus, Rudras (part of the 33 Devas), Ishta/Aradhya Devata, and more—mapped imaginatively via your birth chart for fun and inspiration! Consult a professional astrologer for detailed readings. ✨")
         
+        with st.expander("Birth-Time Sensitivity (±30 Minutes) ⏳"):
+            st.write("Birth times are often uncertain! Here is which result each part of the hour around your birth time gives:")
+            segments = rectification_segments(jd - 30 / 1440.0, jd + 30 / 1440.0, lat, lon)
+            labels = {
+                'ascendant': 'Ascendant Sign',
+                'aradhya': 'Aradhya Devata',
+                'nakshatra': 'Nakshatra & Pada',
+                'ruling_bird': 'Pancha Pakshi Bird',
+                'atmakaraka': 'Atmakaraka',
+                'ishta_devata': 'Ishta Devata'
+            }
+            for quantity, label in labels.items():
+                parts = []
+                for seg_start, seg_end, value in segments[quantity]:
+                    if quantity == 'nakshatra':
+                        value = f"{value[0]} Pada {value[1]}"
+                    elif quantity == 'atmakaraka':
+                        value = value.capitalize()
+                    start_time = jd_to_datetime(seg_start).astimezone(tz).strftime('%H:%M')
+                    end_time = jd_to_datetime(seg_end).astimezone(tz).strftime('%H:%M')
+                    parts.append(f"{value} ({start_time}–{end_time}, {(seg_end - seg_start) * 1440:.0f} min)")
+                st.write(f"- **{label}:** " + "; ".join(parts))
+
         with st.expander("Significance of Sun, Moon, and Ascendant Signs"):
             st.write("""
             - **Sun Sign (Surya Rashi)** 🌞: Represents your core soul (Atma), ego, vitality, father, authority, and career path. It embodies your inner strength and life purpose, shining light on your leadership and societal role.
@@ -0,0 +1,400 @@
+import math
+import datetime
+import functools
+
+# Utility functions
+def rev(angle):
+    return angle - math.floor(angle / 360) * 360
+
+# Julian Date calculation
+def julian_date(year, month, day, hour=0, minute=0, second=0):
+    if month == 1 or month == 2:
+        yearp = year - 1
+        monthp = month + 12
+    else:
+        yearp = year
+        monthp = month
+    
+    if year < 1582 or (year == 1582 and (month < 10 or (month == 10 and day < 15))):
+        B = 0
+    else:
+        A = math.floor(yearp / 100)
+        B = 2 - A + math.floor(A / 4)
+    
+    C = math.floor(365.25 * (yearp + 4716))
+    D = math.floor(30.6001 * (monthp + 1))
+    jd = B + day + C + D - 1524.5
+    jd += (hour + minute / 60.0 + second / 3600.0) / 24.0
+    return jd
+
+# UTC datetime for a Julian Date (inverse of julian_date for Gregorian dates),
+# rounded to the second since a float JD carries sub-second noise
+def jd_to_datetime(jd):
+    j2000 = datetime.datetime(2000, 1, 1, 12, tzinfo=datetime.timezone.utc)
+    return j2000 + datetime.timedelta(seconds=round((jd - 2451545.0) * 86400))
+
+# Calculate Sun's ecliptic longitude
+def calculate_sun_longitude(d):
+    w = 282.9404 + 4.70935e-5 * d
+    e = 0.016709 - 1.151e-9 * d
+    M = rev(356.0470 + 0.9856002585 * d)
+    Mrad = math.radians(M)
+    E = M + math.degrees(e * math.sin(Mrad) * (1.0 + e * math.cos(Mrad)))
+    Erad = math.radians(E)
+    xv = math.cos(Erad) - e
+    yv = math.sin(Erad) * math.sqrt(1.0 - e*e)
+    v = math.degrees(math.atan2(yv, xv))
+    lonsun = rev(v + w)
+    return lonsun
+
+# Improved Moon's ecliptic longitude calculation
+def calculate_moon_longitude(d):
+    T = d / 36525.0
+    L0 = 218.31617 + 481267.88088 * T - 4.06 * T**2 / 3600.0
+    M = 134.96292 + 477198.86753 * T + 33.25 * T**2 / 3600.0
+    MSun = 357.52543 + 35999.04944 * T - 0.58 * T**2 / 3600.0
+    F = 93.27283 + 483202.01873 * T - 11.56 * T**2 / 3600.0
+    D = 297.85027 + 445267.11135 * T - 5.15 * T**2 / 3600.0
+    Delta = (22640 * math.sin(math.radians(M))
+             + 769 * math.sin(math.radians(2 * M))
+             - 4586 * math.sin(math.radians(M - 2 * D))
+             + 2370 * math.sin(math.radians(2 * D))
+             - 668 * math.sin(math.radians(MSun))
+             - 412 * math.sin(math.radians(2 * F))
+             - 125 * math.sin(math.radians(D))
+             - 212 * math.sin(math.radians(2 * M - 2 * D))
+             - 206 * math.sin(math.radians(M + MSun - 2 * D))
+             + 192 * math.sin(math.radians(M + 2 * D))
+             - 165 * math.sin(math.radians(MSun - 2 * D))
+             + 148 * math.sin(math.radians(L0 - MSun))
+             - 110 * math.sin(math.radians(M + MSun))
+             - 55 * math.sin(math.radians(2 * F - 2 * D))) / 3600.0
+    lonecl = rev(L0 + Delta)
+    return lonecl
+
+# Lahiri Ayanamsa approximation
+def calculate_ayanamsa(jd):
+    base_ayan = 23.853  # for J2000
+    rate_per_year = 50.2719 / 3600  # degrees per year
+    years = (jd - 2451545.0) / 365.25
+    ayan = base_ayan + years * rate_per_year
+    return ayan
+
+# Calculate approximate ascendant
+def calculate_ascendant(jd, lat, lon):
+    d = jd - 2451545.0
+    eps = 23.439281 - 0.0000004 * d
+    gmst = rev(280.46061837 + 360.98564736629 * d)
+    lst = rev(gmst + lon + 90)  # Adjustment for sidereal time
+    lst_rad = math.radians(lst)
+    eps_rad = math.radians(eps)
+    lat_rad = math.radians(lat)
+    y = math.sin(lst_rad)
+    x = math.cos(lst_rad) * math.cos(eps_rad) - math.sin(eps_rad) * math.tan(lat_rad)
+    asc_trop = math.degrees(math.atan2(y, x))
+    if asc_trop < 0:
+        asc_trop += 360
+    return asc_trop
+
+# Planetary elements at J2000
+planetary_elements = {
+    'mercury': {
+        'N0': 48.3313, 'N_rate': 3.24587e-5,
+        'i0': 7.0047, 'i_rate': 5.00e-8,
+        'w0': 29.1241, 'w_rate': 1.01444e-5,
+        'a': 0.387098,
+        'e0': 0.205635, 'e_rate': 5.59e-10,
+        'M0': 168.6562, 'M_rate': 4.0923344368
+    },
+    'venus': {
+        'N0': 76.6799, 'N_rate': 2.46590e-5,
+        'i0': 3.3946, 'i_rate': 2.75e-8,
+        'w0': 54.8910, 'w_rate': 1.38374e-5,
+        'a': 0.723330,
+        'e0': 0.006773, 'e_rate': -1.302e-9,
+        'M0': 48.0052, 'M_rate': 1.6021302244
+    },
+    'mars': {
+        'N0': 49.5574, 'N_rate': 2.11081e-5,
+        'i0': 1.8497, 'i_rate': -1.78e-8,
+        'w0': 286.5016, 'w_rate': 2.92961e-5,
+        'a': 1.523688,
+        'e0': 0.093405, 'e_rate': 2.516e-9,
+        'M0': 18.6021, 'M_rate': 0.5240207766
+    },
+    'jupiter': {
+        'N0': 100.4542, 'N_rate': 2.76854e-5,
+        'i0': 1.3030, 'i_rate': -1.557e-7,
+        'w0': 273.8777, 'w_rate': 1.64505e-5,
+        'a': 5.20256,
+        'e0': 0.048498, 'e_rate': 4.469e-9,
+        'M0': 19.8950, 'M_rate': 0.0830853001
+    },
+    'saturn': {
+        'N0': 113.6634, 'N_rate': 2.38980e-5,
+        'i0': 2.4886, 'i_rate': -1.081e-7,
+        'w0': 339.3939, 'w_rate': 2.97661e-5,
+        'a': 9.55475,
+        'e0': 0.055546, 'e_rate': -9.499e-9,
+        'M0': 316.9670, 'M_rate': 0.0334442282
+    }
+}
+
+# Function to get ecliptic longitude for a planet
+def get_ecliptic_longitude(d, planet):
+    if planet == 'sun':
+        return calculate_sun_longitude(d)
+    elif planet == 'moon':
+        return calculate_moon_longitude(d)
+    elif planet == 'rahu':
+        N = 125.1228 - 0.0529538083 * d
+        return rev(N)
+    elif planet == 'ketu':
+        return rev(get_ecliptic_longitude(d, 'rahu') + 180)
+    else:
+        # Compute Sun's position for geocentric correction
+        sun_lon = calculate_sun_longitude(d)
+        xs = math.cos(math.radians(sun_lon))
+        ys = math.sin(math.radians(sun_lon))
+        # Planet elements
+        el = planetary_elements[planet]
+        N = el['N0'] + el['N_rate'] * d
+        i = el['i0'] + el['i_rate'] * d
+        w = el['w0'] + el['w_rate'] * d
+        a = el['a']
+        e = el['e0'] + el['e_rate'] * d
+        M = rev(el['M0'] + el['M_rate'] * d)
+        # Eccentric anomaly E
+        E = M + math.degrees(e * math.sin(math.radians(M)) * (1 + e * math.cos(math.radians(M))))
+        for _ in range(5):
+            E_prev = E
+            E = E_prev - (E_prev - math.degrees(e * math.sin(math.radians(E_prev))) - M) / (1 - e * math.cos(math.radians(E_prev)))
+            if abs(E - E_prev) < 0.001:
+                break
+        # True anomaly v and r
+        xv = a * (math.cos(math.radians(E)) - e)
+        yv = a * math.sqrt(1 - e**2) * math.sin(math.radians(E))
+        v = math.degrees(math.atan2(yv, xv))
+        r = math.sqrt(xv**2 + yv**2)
+        # Heliocentric coordinates
+        xh = r * (math.cos(math.radians(N)) * math.cos(math.radians(v + w)) - math.sin(math.radians(N)) * math.sin(math.radians(v + w)) * math.cos(math.radians(i)))
+        yh = r * (math.sin(math.radians(N)) * math.cos(math.radians(v + w)) + math.cos(math.radians(N)) * math.sin(math.radians(v + w)) * math.cos(math.radians(i)))
+        zh = r * math.sin(math.radians(v + w)) * math.sin(math.radians(i))
+        # Geocentric
+        xge = xs + xh
+        yge = ys + yh
+        zge = zh
+        # Ecliptic longitude
+        lon = math.degrees(math.atan2(yge, xge))
+        return rev(lon)
+
+# Get approximate speed for retrograde detection
+def get_speed(d, planet):
+    dt = 0.01  # small fraction of day
+    long1 = get_ecliptic_longitude(d, planet)
+    long2 = get_ecliptic_longitude(d + dt, planet)
+    delta = (long2 - long1 + 180) % 360 - 180
+    return delta / dt
+
+# Dictionary for sign rulers
+ruler_of = {
+    0: 'mars',  # Aries
+    1: 'venus',  # Taurus
+    2: 'mercury',  # Gemini
+    3: 'moon',  # Cancer
+    4: 'sun',  # Leo
+    5: 'mercury',  # Virgo
+    6: 'venus',  # Libra
+    7: 'mars',  # Scorpio
+    8: 'jupiter',  # Sagittarius
+    9: 'saturn',  # Capricorn
+    10: 'saturn',  # Aquarius
+    11: 'jupiter'  # Pisces
+}
+
+# Deity map from planets for Ishta and Aradhya
+deity_map = {
+    'sun': 'Shiva or Rama',
+    'moon': 'Parvati or Krishna',
+    'mars': 'Skanda (Kartikeya) or Narasimha',
+    'mercury': 'Vishnu',
+    'jupiter': 'Brahma or Guru forms',
+    'venus': 'Lakshmi',
+    'saturn': 'Shani or Ayyappa',
+    'rahu': 'Durga',
+    'ketu': 'Ganesha'
+}
+
+# Additional map for Aradhya Devata examples
+aradhya_map = {
+    'mars': 'Hanuman',
+    'venus': 'Lakshmi',
+    'mercury': 'Durga',
+    'sun': 'Surya or Vishnu',
+    'moon': 'Chandra or Parvati',
+    'jupiter': 'Guru or Brahma',
+    'saturn': 'Shani'
+}
+
+# List of Nakshatras (consistent across both apps)
+nakshatras = ["Ashwini", "Bharani", "Krittika", "Rohini", "Mrigashira", "Ardra", "Punarvasu", "Pushya", "Ashlesha", "Magha", "Purvaphalguni", "Uttaraphalguni", "Hasta", "Chitra", "Swati", "Vishakha", "Anuradha", "Jyeshta", "Mula", "Purvashada", "Uttarashada", "Shravana", "Dhanishta", "Shatabhisha", "Purvabhadra", "Uttarabhadra", "Revati"]
+
+# Original Pancha Pakshi bird mapping
+shukla_birds = {
+    "Vulture": ["Ashwini", "Bharani", "Krittika", "Rohini", "Mrigashira"],
+    "Owl": ["Ardra", "Punarvasu", "Pushya", "Ashlesha", "Magha", "Purvaphalguni"],
+    "Crow": ["Uttaraphalguni", "Hasta", "Chitra", "Swati", "Vishakha"],
+    "Cock": ["Anuradha", "Jyeshta", "Mula", "Purvashada", "Uttarashada"],
+    "Peacock": ["Shravana", "Dhanishta", "Shatabhisha", "Purvabhadra", "Uttarabhadra", "Revati"]
+}
+krishna_birds = {
+    "Peacock": ["Ashwini", "Bharani", "Krittika", "Rohini", "Mrigashira"],
+    "Cock": ["Ardra", "Punarvasu", "Pushya", "Ashlesha", "Magha", "Purvaphalguni"],
+    "Crow": ["Uttaraphalguni", "Hasta", "Chitra", "Swati", "Vishakha"],
+    "Owl": ["Anuradha", "Jyeshta", "Mula", "Purvashada", "Uttarashada"],
+    "Vulture": ["Shravana", "Dhanishta", "Shatabhisha", "Purvabhadra", "Uttarabhadra", "Revati"]
+}
+
+rashis = ["Mesha", "Vrishabha", "Mithuna", "Karka", "Simha", "Kanya", "Tula", "Vrishchika", "Dhanu", "Makara", "Kumbha", "Meena"]
+
+planets = ['sun', 'moon', 'mercury', 'venus', 'mars', 'jupiter', 'saturn', 'rahu', 'ketu']
+ak_planets = ['sun', 'moon', 'mercury', 'venus', 'mars', 'jupiter', 'saturn', 'rahu']
+
+# Slowly moving bodies are evaluated on an hourly grid and interpolated, so
+# nudging the birth time by a few minutes reuses the cached grid points
+slow_planets = ['jupiter', 'saturn', 'rahu', 'ketu']
+slow_grid_step = 1 / 24.0  # days
+
+@functools.lru_cache(maxsize=4096)
+def slow_grid_longitude(planet, k):
+    return get_ecliptic_longitude(k * slow_grid_step, planet)
+
+# Interpolated longitude and speed (degrees/day) of a slow body
+def slow_longitude_and_speed(d, planet):
+    k = math.floor(d / slow_grid_step)
+    frac = d / slow_grid_step - k
+    long0 = slow_grid_longitude(planet, k)
+    long1 = slow_grid_longitude(planet, k + 1)
+    delta = (long1 - long0 + 180) % 360 - 180
+    return rev(long0 + frac * delta), delta / slow_grid_step
+
+def node_longitudes(d):
+    longitudes = {}
+    for planet in planets:
+        if planet in slow_planets:
+            longitudes[planet] = slow_longitude_and_speed(d, planet)[0]
+        else:
+            longitudes[planet] = get_ecliptic_longitude(d, planet)
+    return longitudes
+
+def node_speeds(d):
+    speeds = {}
+    for planet in planets:
+        if planet in slow_planets:
+            speeds[planet] = slow_longitude_and_speed(d, planet)[1]
+        else:
+            speeds[planet] = get_speed(d, planet)
+    return speeds
+
+# Atmakaraka: highest degree within its sign (exclude ketu, reverse if retrograde)
+def node_atmakaraka(longitudes, retro):
+    sign_deg = {}
+    for planet in ak_planets:
+        sl = longitudes[planet] % 30
+        if retro[planet]:
+            sl = 30 - sl
+        sign_deg[planet] = sl
+    return max(sign_deg, key=sign_deg.get)
+
+# Navamsa signs (D9 longitude = long * 9 % 360, sign = floor(/30)); as in the
+# original app this uses the tropical longitudes, not the sidereal ones, so
+# these signs differ from the sidereal D9 in vargas.divisional_charts
+def node_nav_signs(longitudes):
+    nav_signs = {}
+    for planet in planets:
+        nav_long = (longitudes[planet] * 9) % 360
+        nav_signs[planet] = int(nav_long // 30)
+    return nav_signs
+
+# Ishta planet: first planet in the 12th navamsa sign from Karakamsa, else its ruler
+def node_ishta_planet(nav_signs, atmakaraka):
+    karakamsa = nav_signs[atmakaraka]
+    twelfth_sign = (karakamsa + 11) % 12
+    planets_in_twelfth = [p for p in planets if nav_signs[p] == twelfth_sign]
+    if planets_in_twelfth:
+        return planets_in_twelfth[0]  # Pick first for fun
+    return ruler_of[twelfth_sign]
+
+# Nakshatra index and pada of the sidereal Moon
+def node_nakshatra(sid_moon):
+    nak_num = math.floor(sid_moon / (360 / 27))
+    nak_rem = sid_moon % (360 / 27)
+    pada = math.floor(nak_rem / (360 / 108)) + 1
+    return nak_num, pada
+
+# Pancha Pakshi ruling bird (original system)
+def node_ruling_bird(paksha, nakshatra):
+    nak_name = nakshatras[nakshatra[0]]
+    birds = shukla_birds if paksha == "Shukla" else krishna_birds
+    for bird, naks in birds.items():
+        if nak_name in naks:
+            return bird
+    return None
+
+# Chart quantities as a dependency graph: name -> (dependencies, function).
+# Dependencies are inputs ('jd', 'lat', 'lon') or earlier nodes; the dict is
+# kept in dependency order so invalidation can sweep it once.
+chart_nodes = {
+    'd': (('jd',), lambda jd: jd - 2451545.0),
+    'ayanamsa': (('jd',), calculate_ayanamsa),
+    'longitudes': (('d',), node_longitudes),
+    'speeds': (('d',), node_speeds),
+    'retro': (('speeds',), lambda speeds: {p: s < 0 for p, s in speeds.items()}),
+    'atmakaraka': (('longitudes', 'retro'), node_atmakaraka),
+    'nav_signs': (('longitudes',), node_nav_signs),
+    'ishta_planet': (('nav_signs', 'atmakaraka'), node_ishta_planet),
+    'sid_sun': (('longitudes', 'ayanamsa'), lambda longitudes, ayan: (longitudes['sun'] - ayan) % 360),
+    'sun_sign': (('sid_sun',), lambda sid_sun: int(sid_sun // 30)),
+    'sid_moon': (('longitudes', 'ayanamsa'), lambda longitudes, ayan: (longitudes['moon'] - ayan) % 360),
+    'moon_sign': (('sid_moon',), lambda sid_moon: math.floor(sid_moon / 30)),
+    'nakshatra': (('sid_moon',), node_nakshatra),
+    'paksha': (('longitudes',), lambda longitudes: "Shukla" if (longitudes['moon'] - longitudes['sun']) % 360 < 180 else "Krishna"),
+    'ruling_bird': (('paksha', 'nakshatra'), node_ruling_bird),
+    'rahu_sign': (('longitudes', 'ayanamsa'), lambda longitudes, ayan: int(((longitudes['rahu'] - ayan) % 360) // 30)),
+    'asc_trop': (('jd', 'lat', 'lon'), calculate_ascendant),
+    'sid_asc': (('asc_trop', 'ayanamsa'), lambda asc_trop, ayan: (asc_trop - ayan) % 360),
+    'asc_sign': (('sid_asc',), lambda sid_asc: math.floor(sid_asc / 30)),
+    'fifth_ruler': (('asc_sign',), lambda asc_sign: ruler_of[(asc_sign + 4) % 12]),
+    'tenth_sign': (('asc_sign',), lambda asc_sign: (asc_sign + 9) % 12),
+}
+
+# Memoized evaluation of chart_nodes. Keep one instance per session and call
+# set_inputs on every change: only nodes downstream of a changed input are
+# recomputed (e.g. a new location leaves the planetary nodes untouched).
+class ChartGraph:
+    def __init__(self, jd=None, lat=None, lon=None):
+        self.inputs = {}
+        self.values = {}
+        # Only inputs actually given, so a missing one fails as a KeyError
+        self.set_inputs(**{k: v for k, v in (('jd', jd), ('lat', lat), ('lon', lon)) if v is not None})
+
+    def set_inputs(self, **inputs):
+        changed = [k for k, v in inputs.items() if k not in self.inputs or self.inputs[k] != v]
+        self.inputs.update(inputs)
+        self.invalidate(changed)
+
+    def invalidate(self, names):
+        stale = set(names)
+        for node, (deps, _) in chart_nodes.items():
+            if stale.intersection(deps):
+                stale.add(node)
+        for node in stale:
+            self.values.pop(node, None)
+
+    def get(self, name):
+        if name in self.inputs:
+            return self.inputs[name]
+        if name not in self.values:
+            deps, func = chart_nodes[name]
+            self.values[name] = func(*[self.get(dep) for dep in deps])
+        return self.values[name]
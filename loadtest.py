@@ -0,0 +1,370 @@
+import argparse
+import contextlib
+import datetime
+import functools
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+import urllib.request
+import zoneinfo
+from concurrent.futures import ThreadPoolExecutor
+from chart import julian_date, chart_nodes, ChartGraph
+from rectify import rectification_segments
+
+try:
+    import resource
+except ImportError:  # not available on Windows; peak_rss_mb is then omitted
+    resource = None
+
+# Offline load generator for the chart pipeline and the Streamlit app.
+#
+#   python loadtest.py --mode pipeline --concurrency 1,4,16 --sessions 200
+#   python loadtest.py --mode server --concurrency 1,4,16 --sessions 40
+#   python loadtest.py --mode server --compare loadtest_results/abc1234-server.json
+#
+# server mode starts one local `streamlit run app.py` and drives concurrent
+# browser-like sessions over its websocket, so the figures show how a single
+# server degrades as users are added.
+#
+# Each simulated session makes one chart request and then a few "what if"
+# follow-ups (new location, time nudged by minutes, new date), the way users
+# explore in the app. Inputs are drawn from a seeded RNG so runs are
+# reproducible, and results are saved as JSON for comparison across versions.
+
+# Birth places with relative weights, jittered by up to a degree; the rest of
+# the traffic uses any timezone and anywhere on the globe
+sample_places = [
+    ('Asia/Kolkata', 13.32, 75.77, 8), ('Asia/Kolkata', 12.97, 77.59, 8),
+    ('Asia/Kolkata', 19.08, 72.88, 8), ('Asia/Kolkata', 28.61, 77.21, 8),
+    ('Asia/Kolkata', 13.08, 80.27, 6), ('Asia/Kolkata', 22.57, 88.36, 6),
+    ('Asia/Kathmandu', 27.72, 85.32, 2), ('Asia/Colombo', 6.93, 79.86, 2),
+    ('Asia/Dubai', 25.20, 55.27, 3), ('Asia/Singapore', 1.35, 103.82, 3),
+    ('Europe/London', 51.51, -0.13, 4), ('Europe/Berlin', 52.52, 13.40, 2),
+    ('America/New_York', 40.71, -74.01, 5), ('America/Chicago', 41.88, -87.63, 2),
+    ('America/Los_Angeles', 34.05, -118.24, 4), ('America/Toronto', 43.65, -79.38, 2),
+    ('Australia/Sydney', -33.87, 151.21, 2), ('Africa/Johannesburg', -26.20, 28.05, 1),
+    ('America/Sao_Paulo', -23.55, -46.63, 1), ('Asia/Tokyo', 35.68, 139.69, 1),
+]
+random_place_share = 0.15
+
+all_timezones = sorted(zoneinfo.available_timezones())
+
+def random_place(rng):
+    if rng.random() < random_place_share:
+        return rng.choice(all_timezones), rng.uniform(-66, 66), rng.uniform(-180, 180)
+    tz, lat, lon, _ = rng.choices(sample_places, weights=[p[3] for p in sample_places])[0]
+    return tz, round(lat + rng.uniform(-1, 1), 2), round(lon + rng.uniform(-1, 1), 2)
+
+# Birth dates cluster around recent decades but cover the app's 1900-2100 range
+def random_birth(rng):
+    year = min(2099, max(1901, int(rng.gauss(1990, 18))))
+    date = datetime.date(year, 1, 1) + datetime.timedelta(days=rng.randrange(365))
+    time_of_day = datetime.time(rng.randrange(24), rng.randrange(60))
+    return date, time_of_day
+
+def random_inputs(rng):
+    date, time_of_day = random_birth(rng)
+    tz, lat, lon = random_place(rng)
+    return {'dob': date, 'tob': time_of_day, 'timezone': tz, 'lat': lat, 'lon': lon}
+
+# Follow-up request within a session: mostly location or small time changes
+def what_if(rng, inputs):
+    inputs = dict(inputs)
+    roll = rng.random()
+    if roll < 0.45:
+        inputs['timezone'], inputs['lat'], inputs['lon'] = random_place(rng)
+    elif roll < 0.8:
+        nudged = datetime.datetime.combine(inputs['dob'], inputs['tob']) + datetime.timedelta(minutes=rng.randint(-30, 30))
+        inputs['dob'], inputs['tob'] = nudged.date(), nudged.time()
+    else:
+        inputs['dob'], inputs['tob'] = random_birth(rng)
+    return inputs
+
+def session_requests(seed, clicks):
+    rng = random.Random(seed)
+    requests = [random_inputs(rng)]
+    for _ in range(clicks - 1):
+        requests.append(what_if(rng, requests[-1]))
+    return requests
+
+def to_jd(inputs):
+    local_dt = datetime.datetime.combine(inputs['dob'], inputs['tob']).replace(tzinfo=zoneinfo.ZoneInfo(inputs['timezone']))
+    utc_dt = local_dt.astimezone(zoneinfo.ZoneInfo("UTC"))
+    return julian_date(utc_dt.year, utc_dt.month, utc_dt.day, utc_dt.hour, utc_dt.minute, utc_dt.second)
+
+# Pipeline session: one ChartGraph kept across clicks, as app.py keeps it in
+# st.session_state; each click evaluates every node plus the sensitivity window
+class PipelineSession:
+    def __init__(self):
+        self.graph = ChartGraph()
+
+    def request(self, inputs):
+        jd = to_jd(inputs)
+        self.graph.set_inputs(jd=jd, lat=inputs['lat'], lon=inputs['lon'])
+        for name in chart_nodes:
+            self.graph.get(name)
+        rectification_segments(jd - 30 / 1440.0, jd + 30 / 1440.0, inputs['lat'], inputs['lon'])
+
+    def close(self):
+        pass
+
+# Server session: one websocket connection to a running Streamlit server,
+# speaking the same protocol as the browser. Each click sends the widget
+# states with the button triggered and waits for the script run to finish.
+class ServerSession:
+    def __init__(self, url):
+        from websockets.sync.client import connect
+        self.stack = contextlib.ExitStack()
+        self.ws = self.stack.enter_context(connect(url, subprotocols=["streamlit"], max_size=None))
+        self.widget_ids = {}
+        self.rerun([])
+
+    def rerun(self, widget_states):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        msg.rerun_script.widget_states.widgets.extend(widget_states)
+        self.ws.send(msg.SerializeToString())
+        error = None
+        while True:
+            reply = ForwardMsg()
+            reply.ParseFromString(self.ws.recv())
+            kind = reply.WhichOneof('type')
+            if kind == 'delta' and reply.delta.WhichOneof('type') == 'new_element':
+                element = reply.delta.new_element
+                widget = element.WhichOneof('type')
+                if widget == 'exception':
+                    error = element.exception.message
+                elif widget == 'alert' and element.alert.format == element.alert.ERROR:
+                    error = element.alert.body
+                elif widget in ('date_input', 'time_input', 'selectbox', 'number_input', 'button'):
+                    self.widget_ids[getattr(element, widget).label] = getattr(element, widget).id
+            elif kind == 'script_finished':
+                break
+        if error:
+            raise RuntimeError(error)
+
+    def request(self, inputs):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        ids = self.widget_ids
+        states = [
+            WidgetState(id=ids["Date of Birth"], string_array_value={'data': [inputs['dob'].isoformat()]}),
+            WidgetState(id=ids["Time of Birth (Local Time)"], string_value=inputs['tob'].strftime('%H:%M')),
+            WidgetState(id=ids["Timezone 🌍"], string_value=inputs['timezone']),
+            WidgetState(id=ids["Latitude of Birth Place"], double_value=inputs['lat']),
+            WidgetState(id=ids["Longitude of Birth Place"], double_value=inputs['lon']),
+            WidgetState(id=ids["Generate Fun Insights! 🌟"], trigger_value=True),
+        ]
+        self.rerun(states)
+
+    def close(self):
+        self.stack.close()
+
+# Start `streamlit run` on a local port and wait until it reports healthy
+@contextlib.contextmanager
+def streamlit_server(app_path, port):
+    command = [sys.executable, '-m', 'streamlit', 'run', app_path, '--server.headless', 'true',
+               '--server.port', str(port), '--browser.gatherUsageStats', 'false']
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=2) as response:
+                    if response.status == 200:
+                        break
+            except OSError:
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"streamlit server did not start on port {port}")
+                time.sleep(0.2)
+        yield server
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+# Resident and peak memory of a process in KiB, from /proc (Linux)
+def process_memory_kb(pid):
+    memory = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'VmHWM'):
+                memory[key] = int(value.split()[0])
+    return memory
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+# One simulated session; returns its request latencies (seconds) and errors
+def run_session(make_session, seed, clicks):
+    latencies = []
+    errors = []
+    session = make_session()
+    try:
+        for inputs in session_requests(seed, clicks):
+            start = time.perf_counter()
+            try:
+                session.request(inputs)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                continue
+            latencies.append(time.perf_counter() - start)
+    finally:
+        session.close()
+    return latencies, errors
+
+# Sessions run on a thread pool: in pipeline mode they share this process,
+# as sessions share one Streamlit server; in server mode each thread is a
+# client and the server process does the work
+def run_load(make_session, concurrency, sessions, clicks, seed):
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(run_session, make_session, seed * 1000003 + index, clicks) for index in range(sessions)]
+        for future in futures:
+            session_latencies, session_errors = future.result()
+            latencies.extend(session_latencies)
+            errors.extend(session_errors)
+    duration = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies) + len(errors),
+        'errors': len(errors),
+        'error_samples': errors[:5],
+        'duration_s': round(duration, 3),
+        'throughput_rps': round(len(latencies) / duration, 2) if duration > 0 else None,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+            'p50': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+            'p95': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+            'p99': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+            'max': round(latencies[-1] * 1000, 2) if latencies else None,
+        },
+    }
+
+# Memory retained per live session, measured in a separate sequential pass
+# after a warm-up session has loaded shared imports and caches. Pipeline
+# sessions are traced with tracemalloc; server sessions are measured as the
+# growth of the server's resident memory while they stay connected.
+def memory_per_session(make_session, sessions, clicks, seed, server_pid=None):
+    run_session(make_session, seed * 1000003 - 1, clicks)
+    if server_pid is None:
+        tracemalloc.start()
+        baseline = tracemalloc.take_snapshot()
+    else:
+        baseline_rss = process_memory_kb(server_pid)['VmRSS']
+    live = []
+    for index in range(sessions):
+        session = make_session()
+        for inputs in session_requests(seed * 1000003 + index, clicks):
+            session.request(inputs)
+        live.append(session)
+    if server_pid is None:
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        retained_kb = sum(stat.size_diff for stat in snapshot.compare_to(baseline, 'filename')) / 1024
+    else:
+        retained_kb = process_memory_kb(server_pid)['VmRSS'] - baseline_rss
+    for session in live:
+        session.close()
+    return round(retained_kb / sessions, 1)
+
+def default_label():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'local'
+
+def print_result(result, previous=None):
+    lat = result['latency_ms']
+    line = (f"[{result['mode']}] concurrency={result['concurrency']:<3} "
+            f"rps={result['throughput_rps']:<8} p50={lat['p50']}ms p95={lat['p95']}ms p99={lat['p99']}ms "
+            f"errors={result['errors']}")
+    if previous:
+        prev_lat = previous['latency_ms']
+        line += (f"  (was rps={previous['throughput_rps']} p50={prev_lat['p50']}ms "
+                 f"p95={prev_lat['p95']}ms p99={prev_lat['p99']}ms)")
+    print(line)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test for the Vedic Deva Mapper chart pipeline and Streamlit server.")
+    parser.add_argument('--mode', choices=['pipeline', 'server'], default='pipeline')
+    parser.add_argument('--app', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py'))
+    parser.add_argument('--port', type=int, default=8599, help="port for the local server in server mode")
+    parser.add_argument('--concurrency', default='1,4,16', help="comma-separated levels to run, e.g. 1,4,16")
+    parser.add_argument('--sessions', type=int, default=100, help="sessions per concurrency level")
+    parser.add_argument('--clicks', type=int, default=5, help="button presses per session")
+    parser.add_argument('--memory-sessions', type=int, default=20, help="sessions kept alive to measure memory (0 to skip)")
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--label', default=None, help="name for this run, defaults to the git commit")
+    parser.add_argument('--output', default=None, help="JSON file to write, defaults to loadtest_results/<label>-<mode>.json")
+    parser.add_argument('--compare', default=None, help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    label = args.label or default_label()
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            earlier = json.load(f)
+        # Reports from before 'mode' was stored carry it in config
+        earlier_mode = earlier.get('mode', earlier.get('config', {}).get('mode'))
+        if earlier_mode != args.mode:
+            parser.error(f"--compare file is a {earlier_mode} run, this is a {args.mode} run")
+        previous = {r['concurrency']: r for r in earlier['results']}
+
+    report = {
+        'label': label,
+        'mode': args.mode,
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'config': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+        'results': [],
+    }
+    with contextlib.ExitStack() as stack:
+        server_pid = None
+        if args.mode == 'server':
+            server_pid = stack.enter_context(streamlit_server(args.app, args.port)).pid
+            url = f"ws://localhost:{args.port}/_stcore/stream"
+            make_session = functools.partial(ServerSession, url)
+        else:
+            make_session = PipelineSession
+
+        # Memory first, while the server's heap has not yet grown and been
+        # freed by the load levels (freed memory would mask new sessions)
+        if args.memory_sessions > 0:
+            report['memory_per_session_kb'] = memory_per_session(make_session, args.memory_sessions, args.clicks, args.seed, server_pid)
+            print(f"memory per session: {report['memory_per_session_kb']} KiB")
+
+        for concurrency in [int(c) for c in args.concurrency.split(',')]:
+            result = {'mode': args.mode, 'concurrency': concurrency}
+            result.update(run_load(make_session, concurrency, args.sessions, args.clicks, args.seed))
+            print_result(result, previous.get(concurrency))
+            report['results'].append(result)
+
+        # VmHWM / ru_maxrss are KiB on Linux
+        if server_pid is not None:
+            report['server_peak_rss_mb'] = round(process_memory_kb(server_pid)['VmHWM'] / 1024, 1)
+        if resource is not None:
+            report['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    output = args.output or os.path.join('loadtest_results', f"{label}-{args.mode}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"saved {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import csv
+import datetime
+import math
+import sys
+import zoneinfo
+from chart import rev, julian_date, jd_to_datetime, calculate_sun_longitude, calculate_moon_longitude, calculate_ayanamsa, nakshatras
+
+tithis = ["Pratipada", "Dwitiya", "Tritiya", "Chaturthi", "Panchami", "Shashthi", "Saptami", "Ashtami", "Navami", "Dashami", "Ekadashi", "Dwadashi", "Trayodashi", "Chaturdashi"]
+tithi_names = [f"Shukla {t}" for t in tithis] + ["Purnima"] + [f"Krishna {t}" for t in tithis] + ["Amavasya"]
+
+yogas = ["Vishkambha", "Priti", "Ayushman", "Saubhagya", "Shobhana", "Atiganda", "Sukarma", "Dhriti", "Shula", "Ganda", "Vriddhi", "Dhruva", "Vyaghata", "Harshana", "Vajra", "Siddhi", "Vyatipata", "Variyan", "Parigha", "Shiva", "Siddha", "Sadhya", "Shubha", "Shukla", "Brahma", "Indra", "Vaidhriti"]
+
+# 60 half-tithis: fixed Kimstughna first, the 7 movable karanas repeated 8
+# times, then the fixed Shakuni, Chatushpada and Naga
+movable_karanas = ["Bava", "Balava", "Kaulava", "Taitila", "Gara", "Vanija", "Vishti"]
+karana_names = ["Kimstughna"] + [movable_karanas[i % 7] for i in range(56)] + ["Shakuni", "Chatushpada", "Naga"]
+
+# Weekday names by Python weekday() (Monday = 0)
+varas = ["Somavara", "Mangalavara", "Budhavara", "Guruvara", "Shukravara", "Shanivara", "Ravivara"]
+
+sidereal_rate = 360.98564736629  # degrees of hour angle per day
+
+# calculate_sun_longitude uses Schlyter's elements, whose day count starts at
+# JD 2451543.5 rather than J2000. The app passes J2000 days, so its Sun lags
+# this one by about 1.5 deg. Near boundaries that changes the app's sidereal
+# Sun sign (and Aditya) and its paksha (and ruling bird): its paksha turns
+# about 3 hours before the panchang's tithi around every new and full moon.
+def sun_longitude(jd):
+    return calculate_sun_longitude(jd - 2451543.5)
+
+# Sunrise (upper limb, standard refraction) nearest to jd_guess, or None when
+# the Sun does not rise that day (polar latitudes)
+def calculate_sunrise(jd_guess, lat, lon):
+    t = jd_guess
+    for _ in range(5):
+        d = t - 2451545.0
+        eps_rad = math.radians(23.439281 - 0.0000004 * d)
+        sun_rad = math.radians(sun_longitude(t))
+        ra = math.degrees(math.atan2(math.cos(eps_rad) * math.sin(sun_rad), math.cos(sun_rad)))
+        dec_rad = math.asin(math.sin(eps_rad) * math.sin(sun_rad))
+        lat_rad = math.radians(lat)
+        cos_h0 = (math.sin(math.radians(-0.833)) - math.sin(lat_rad) * math.sin(dec_rad)) / (math.cos(lat_rad) * math.cos(dec_rad))
+        if abs(cos_h0) > 1:
+            return None
+        hour_angle = rev(280.46061837 + sidereal_rate * d + lon - ra)
+        # Hour angle at sunrise is -h0
+        shift = ((-math.degrees(math.acos(cos_h0)) - hour_angle + 180) % 360 - 180) / sidereal_rate
+        t += shift
+        if abs(shift) < 1e-6:
+            break
+    return t
+
+# Moon-Sun elongation, sidereal Moon and the yoga sum at a Julian Date
+def panchang_angles(jd):
+    d = jd - 2451545.0
+    sun = sun_longitude(jd)
+    moon = calculate_moon_longitude(d)
+    ayan = calculate_ayanamsa(jd)
+    return {
+        'elong': (moon - sun) % 360,
+        'sid_moon': (moon - ayan) % 360,
+        'yoga_sum': (sun + moon - 2 * ayan) % 360,
+    }
+
+# Panchang elements: (angle, span of one element in degrees, names). All
+# three angles only ever increase, so each element ends at the next multiple
+# of its span.
+panchang_elements = {
+    'tithi': ('elong', 12.0, tithi_names),
+    'karana': ('elong', 6.0, karana_names),
+    'nakshatra': ('sid_moon', 360 / 27, nakshatras),
+    'yoga': ('yoga_sum', 360 / 27, yogas),
+}
+
+# Time after t0 at which the angle reaches target, by secant iteration
+# started from rate (degrees/day) as the first slope estimate
+def find_crossing(angle, target, t0, rate, tolerance=1 / 86400.0):
+    def error(t):
+        return (panchang_angles(t)[angle] - target + 180) % 360 - 180
+
+    t_prev, err_prev = t0, error(t0)
+    t = t0 - err_prev / rate
+    for _ in range(20):
+        err = error(t)
+        if err == err_prev:
+            break
+        t_next = t - err * (t - t_prev) / (err - err_prev)
+        t_prev, err_prev, t = t, err, t_next
+        if abs(t - t_prev) < tolerance:
+            break
+    return t
+
+# Mean daily motion of each angle, used to seed find_crossing
+angle_rates = {'elong': 12.19, 'sid_moon': 13.18, 'yoga_sum': 14.16}
+
+def local_noon_jd(date, tz):
+    utc_dt = datetime.datetime.combine(date, datetime.time(12)).replace(tzinfo=tz).astimezone(zoneinfo.ZoneInfo("UTC"))
+    return julian_date(utc_dt.year, utc_dt.month, utc_dt.day, utc_dt.hour, utc_dt.minute, utc_dt.second)
+
+# Start of the panchang day: sunrise, or local midnight where the Sun does not
+# rise. The previous day's sunrise seeds the search.
+def day_start_jd(date, tz, lat, lon, previous_sunrise):
+    noon = local_noon_jd(date, tz)
+    sunrise = calculate_sunrise(previous_sunrise + 1 if previous_sunrise is not None else noon - 0.25, lat, lon)
+    if sunrise is not None and abs(sunrise - (noon - 0.25)) > 0.5:
+        # Warm start converged to a neighbouring day (e.g. near polar night)
+        sunrise = calculate_sunrise(noon - 0.25, lat, lon)
+    return sunrise, sunrise if sunrise is not None else noon - 0.5
+
+# Stream one panchang row per day from start_date. Each day runs from its
+# sunrise to the next and lists, for every element, each (name, end) in
+# force during it: the one at sunrise first, then any that begin later that
+# day, including ones that end before the next sunrise. State carries over
+# between days: an element's end time is only searched for once the previous
+# one has passed, starting from that previous boundary.
+def panchang_rows(start_date, days, lat, lon, timezone):
+    tz = zoneinfo.ZoneInfo(timezone)
+    state = {}
+    sunrise, day_start = day_start_jd(start_date, tz, lat, lon, None)
+    for offset in range(days):
+        date = start_date + datetime.timedelta(days=offset)
+        next_sunrise, day_end = day_start_jd(date + datetime.timedelta(days=1), tz, lat, lon, sunrise)
+
+        if not state:
+            angles = panchang_angles(day_start)
+            for name, (angle, span, names) in panchang_elements.items():
+                index = int(angles[angle] // span) % len(names)
+                state[name] = (index, find_crossing(angle, ((index + 1) * span) % 360, day_start, angle_rates[angle]))
+
+        row = {
+            'date': date.isoformat(),
+            'vara': varas[date.weekday()],
+            'sunrise': jd_to_datetime(sunrise).astimezone(tz).isoformat(timespec='minutes') if sunrise is not None else '',
+        }
+        for name, (angle, span, names) in panchang_elements.items():
+            index, end = state[name]
+            while end <= day_start:
+                index = (index + 1) % len(names)
+                end = find_crossing(angle, ((index + 1) * span) % 360, end, angle_rates[angle])
+            entries = [(names[index], end)]
+            while end < day_end:
+                index = (index + 1) % len(names)
+                end = find_crossing(angle, ((index + 1) * span) % 360, end, angle_rates[angle])
+                entries.append((names[index], end))
+            state[name] = (index, end)
+            row[name] = [(element, jd_to_datetime(jd).astimezone(tz).isoformat(timespec='minutes')) for element, jd in entries]
+        yield row
+        sunrise, day_start = next_sunrise, day_end
+
+panchang_columns = ['date', 'vara', 'sunrise', 'tithi', 'nakshatra', 'yoga', 'karana']
+
+# Flatten a row for CSV: "Taitila until 2024-01-01T14:25+05:30; Gara until ..."
+def csv_row(row):
+    return {
+        column: "; ".join(f"{element} until {end}" for element, end in value) if isinstance(value, list) else value
+        for column, value in row.items()
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a daily panchang as CSV.")
+    parser.add_argument('--start', type=datetime.date.fromisoformat, default=datetime.date.today())
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--lat', type=float, default=13.32)
+    parser.add_argument('--lon', type=float, default=75.77)
+    parser.add_argument('--timezone', default="Asia/Kolkata")
+    args = parser.parse_args(argv)
+
+    writer = csv.DictWriter(sys.stdout, fieldnames=panchang_columns)
+    writer.writeheader()
+    for row in panchang_rows(args.start, args.days, args.lat, args.lon, args.timezone):
+        writer.writerow(csv_row(row))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import math
+from chart import deity_map, aradhya_map, nakshatras, rashis, ChartGraph
+
+# Results tracked for birth-time rectification, each read from a ChartGraph.
+# Bisection only asks for one of these at a time, so the graph evaluates just
+# the angles that result depends on (e.g. the ascendant alone).
+rectification_quantities = {
+    'ascendant': lambda graph: rashis[graph.get('asc_sign')],
+    'aradhya': lambda graph: aradhya_map.get(graph.get('fifth_ruler'), deity_map.get(graph.get('fifth_ruler'), 'Unknown')),
+    'nakshatra': lambda graph: (nakshatras[graph.get('nakshatra')[0]], graph.get('nakshatra')[1]),
+    'ruling_bird': lambda graph: graph.get('ruling_bird'),
+    'atmakaraka': lambda graph: graph.get('atmakaraka'),
+    'ishta_devata': lambda graph: deity_map[graph.get('ishta_planet')],
+}
+
+# Narrow [jd0, jd1] until it is within tolerance, keeping value(jd0) == v0 and
+# value(jd1) != v0; returns jd1, the first instant with the new value
+def find_boundary(value_at, jd0, jd1, v0, tolerance):
+    while jd1 - jd0 > tolerance:
+        mid = (jd0 + jd1) / 2
+        if value_at(mid) == v0:
+            jd0 = mid
+        else:
+            jd1 = mid
+    return jd1
+
+# Split [start_jd, end_jd] into segments where each result stays constant.
+# The window is sampled every scan_step days and boundaries between samples
+# that differ are located by bisection to within tolerance days. Returns
+# {quantity: [(segment_start_jd, segment_end_jd, value), ...]}.
+def rectification_segments(start_jd, end_jd, lat, lon, scan_step=10 / 1440.0, tolerance=1 / 86400.0):
+    graph = ChartGraph()
+    n = max(1, math.ceil((end_jd - start_jd) / scan_step))
+    samples = [start_jd + (end_jd - start_jd) * i / n for i in range(n + 1)]
+    sampled = []
+    for jd in samples:
+        graph.set_inputs(jd=jd, lat=lat, lon=lon)
+        sampled.append({name: read(graph) for name, read in rectification_quantities.items()})
+
+    segments = {}
+    for name, read in rectification_quantities.items():
+        def value_at(jd):
+            graph.set_inputs(jd=jd, lat=lat, lon=lon)
+            return read(graph)
+
+        segments[name] = []
+        seg_start = start_jd
+        for i in range(1, n + 1):
+            jd0, v0 = samples[i - 1], sampled[i - 1][name]
+            # Loop in case the value changes more than once between samples
+            while v0 != sampled[i][name]:
+                boundary = find_boundary(value_at, jd0, samples[i], v0, tolerance)
+                segments[name].append((seg_start, boundary, v0))
+                seg_start, jd0, v0 = boundary, boundary, value_at(boundary)
+        segments[name].append((seg_start, end_jd, sampled[-1][name]))
+    return segments
+
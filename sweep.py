@@ -0,0 +1,59 @@
+import numpy as np
+from chart import rev, calculate_ayanamsa, ruler_of, deity_map, aradhya_map, planets
+
+# Lookup tables from ascendant sign (0-11) to derived values, as arrays so a
+# whole grid can be mapped with one fancy-indexing step
+fifth_ruler_index = np.array([planets.index(ruler_of[(s + 4) % 12]) for s in range(12)], dtype=np.int8)
+tenth_sign_index = np.array([(s + 9) % 12 for s in range(12)], dtype=np.int8)
+
+# Names for decoding the int8 arrays returned by the sweep
+aradhya_names = [aradhya_map.get(p, deity_map.get(p, 'Unknown')) for p in planets]
+
+# Vectorized calculate_ascendant: lat and lon are 1-D arrays and the result is
+# the tropical ascendant on the (lat, lon) grid. Sidereal time depends only on
+# lon and tan(lat) only on lat, so those are computed once per axis.
+def calculate_ascendant_array(jd, lat, lon):
+    d = jd - 2451545.0
+    eps_rad = np.radians(23.439281 - 0.0000004 * d)
+    gmst = rev(280.46061837 + 360.98564736629 * d)
+    lst_rad = np.radians(np.asarray(lon, dtype=np.float64) + gmst + 90)  # Adjustment for sidereal time
+    tan_lat = np.tan(np.radians(np.asarray(lat, dtype=np.float64)))
+    y = np.sin(lst_rad)[np.newaxis, :]
+    x = np.cos(lst_rad)[np.newaxis, :] * np.cos(eps_rad) - np.sin(eps_rad) * tan_lat[:, np.newaxis]
+    return np.degrees(np.arctan2(y, x)) % 360
+
+# Evaluate the sweep in blocks of latitude rows, yielding (row slice, values)
+# so callers can stream a large grid without holding the float temporaries
+def iter_location_sweep(jd, lats, lons, chunk_rows=128):
+    ayan = calculate_ayanamsa(jd)
+    for start in range(0, len(lats), chunk_rows):
+        rows = slice(start, min(start + chunk_rows, len(lats)))
+        sid_asc = (calculate_ascendant_array(jd, lats[rows], lons) - ayan) % 360
+        asc_sign = np.minimum(sid_asc // 30, 11).astype(np.int8)
+        yield rows, {
+            'sid_asc': sid_asc.astype(np.float32),
+            'asc_sign': asc_sign,
+            'aradhya': fifth_ruler_index[asc_sign],
+            'indra_sign': tenth_sign_index[asc_sign],
+        }
+
+# Sidereal ascendant and house-derived deities over a lat/lon grid for one
+# instant. 'aradhya' holds indices into planets (see aradhya_names), the
+# sign arrays index rashis; Prajapati follows the ascendant sign itself.
+def location_sweep(jd, lat_step=0.1, lon_step=0.1, chunk_rows=128):
+    lats = np.round(np.arange(-90, 90 + lat_step / 2, lat_step), 6)
+    lons = np.round(np.arange(-180, 180 + lon_step / 2, lon_step), 6)
+    shape = (len(lats), len(lons))
+    result = {
+        'lats': lats,
+        'lons': lons,
+        'sid_asc': np.empty(shape, dtype=np.float32),
+        'asc_sign': np.empty(shape, dtype=np.int8),
+        'aradhya': np.empty(shape, dtype=np.int8),
+        'indra_sign': np.empty(shape, dtype=np.int8),
+    }
+    for rows, chunk in iter_location_sweep(jd, lats, lons, chunk_rows):
+        for key, values in chunk.items():
+            result[key][rows] = values
+    result['prajapati_sign'] = result['asc_sign'].copy()
+    return result
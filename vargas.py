@@ -0,0 +1,73 @@
+import numpy as np
+from chart import planets
+
+# Divisional charts (vargas) per Parashara. Every varga maps (sign, part of
+# the sign) to a sign, so each is stored as a (12, parts) int8 lookup table
+# and a whole longitude array is mapped with one floor and one gather.
+# Signs are 0-11 from Mesha, so even indices are the odd signs.
+
+def varga_table(parts, rule):
+    # rule(sign, part) gives the varga sign for that part of the sign
+    return np.array([[rule(sign, part) % 12 for part in range(parts)] for sign in range(12)], dtype=np.int8)
+
+def uniform_varga(parts, start):
+    # Parts counted on from start(sign), the sign the first part maps to
+    return varga_table(parts, lambda sign, part: start(sign) + part)
+
+def hora_table():
+    # Odd signs: Sun's hora (Simha) then Moon's (Karka); even signs reversed
+    return varga_table(2, lambda sign, part: [4, 3][part] if sign % 2 == 0 else [3, 4][part])
+
+def trimsamsa_table():
+    # Unequal portions in whole degrees, tabulated at one-degree resolution
+    odd = [(5, 0), (10, 10), (18, 8), (25, 2), (30, 6)]   # Mars, Saturn, Jupiter, Mercury, Venus
+    even = [(5, 1), (12, 5), (20, 11), (25, 9), (30, 7)]  # Venus, Mercury, Jupiter, Saturn, Mars
+    table = np.empty((12, 30), dtype=np.int8)
+    for sign in range(12):
+        portions = odd if sign % 2 == 0 else even
+        for degree in range(30):
+            table[sign, degree] = next(target for end, target in portions if degree < end)
+    return table
+
+varga_tables = {
+    'D1': uniform_varga(1, lambda sign: sign),
+    'D2': hora_table(),
+    'D3': varga_table(3, lambda sign, part: sign + 4 * part),
+    'D7': uniform_varga(7, lambda sign: sign if sign % 2 == 0 else sign + 6),
+    'D9': uniform_varga(9, lambda sign: [0, 9, 6, 3][sign % 4]),
+    'D10': uniform_varga(10, lambda sign: sign if sign % 2 == 0 else sign + 8),
+    'D12': uniform_varga(12, lambda sign: sign),
+    'D16': uniform_varga(16, lambda sign: [0, 4, 8][sign % 3]),
+    'D20': uniform_varga(20, lambda sign: [0, 8, 4][sign % 3]),
+    'D24': uniform_varga(24, lambda sign: 4 if sign % 2 == 0 else 3),
+    'D27': uniform_varga(27, lambda sign: [0, 3, 6, 9][sign % 4]),
+    'D30': trimsamsa_table(),
+    'D40': uniform_varga(40, lambda sign: 0 if sign % 2 == 0 else 6),
+    'D45': uniform_varga(45, lambda sign: [0, 4, 8][sign % 3]),
+    'D60': uniform_varga(60, lambda sign: sign),
+}
+
+# Order of the bodies returned by graph_longitudes
+varga_bodies = planets + ['ascendant']
+
+# Sidereal longitudes of all grahas and the ascendant from a ChartGraph
+def graph_longitudes(graph):
+    ayan = graph.get('ayanamsa')
+    longitudes = graph.get('longitudes')
+    return np.array([(longitudes[p] - ayan) % 360 for p in planets] + [graph.get('sid_asc')])
+
+# Every varga divides a sign into a divisor of 15120 parts, so one integer
+# position per longitude indexes all of them. Tables are expanded to that
+# resolution once; each varga is then a single int8 gather on a shared index.
+varga_resolution = 15120
+expanded_tables = {
+    name: np.repeat(table, varga_resolution // table.shape[1], axis=1).ravel()
+    for name, table in varga_tables.items()
+}
+
+# Sign placements in each varga for an array of longitudes of any shape, e.g.
+# (charts, bodies). Returns {varga: int8 array of the same shape}.
+def divisional_charts(longitudes, vargas=None):
+    longitudes = np.asarray(longitudes, dtype=np.float64) % 360
+    index = np.minimum(longitudes * (varga_resolution / 30.0), 12 * varga_resolution - 1).astype(np.int32)
+    return {name: np.take(expanded_tables[name], index) for name in vargas or varga_tables}